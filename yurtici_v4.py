@@ -6,6 +6,7 @@
 #
 # Kurulum:
 #   pip install requests beautifulsoup4 playsound==1.2.2 pyttsx3
+#   (hız için, opsiyonel) pip install selectolax
 #   pip install selenium
 #   (gerekirse) pip install webdriver-manager
 #
@@ -16,19 +17,31 @@
 from __future__ import annotations
 
 import argparse
+import functools
+import hashlib
+import json
 import os
+import queue
+import random
 import re
+import shlex
+import signal
 import sys
 import time
 import threading
 import unicodedata
 from dataclasses import dataclass
-from datetime import datetime
 from typing import Optional
 
 import requests
+from requests.adapters import HTTPAdapter, Retry
 from bs4 import BeautifulSoup
 
+try:
+    from selectolax.parser import HTMLParser as _FastHTMLParser
+except Exception:
+    _FastHTMLParser = None
+
 try:
     from playsound import playsound
 except Exception:
@@ -50,14 +63,50 @@ UA = (
 
 DEFAULT_MP3 = r"C:\Users\user\Documents\ok.mp3"
 
+_NOT_FOUND_RE = re.compile(r"KARGO BULUNAMADI|GONDERI KODUYLA BIR KARGO BULUNAMADI|BIR KARGO BULUNAMADI")
+# norm_tr çıktısı aksansız UPPER olduğu için tek desen yeter.
+_CLASSIFY_RE = re.compile(r"(?P<teslim>TESLIM EDILDI)|(?P<vardi>VARIS BIRIMINDE)|(?P<yolda>TASIMA|TRANSFER|SEVK|YOLDA)")
+# "bulunamadı" mesajı gerçek sayfada bir modal/uyarı kutusunda çıkıyor;
+# önce ona bak, tüm ağacı gezmek son çare.
+_NOT_FOUND_SCOPE_SEL = '.modal, .alert, .error-message, [class*="not-found"], [class*="bulunamadi"]'
+
+
+# Türkçe aksan tablosu: dar karakter seti için NFKD'den çok daha hızlı.
+_TR_MAP = str.maketrans({
+    "İ": "I", "ı": "I",
+    "ç": "C", "Ç": "C",
+    "ğ": "G", "Ğ": "G",
+    "ö": "O", "Ö": "O",
+    "ş": "S", "Ş": "S",
+    "ü": "U", "Ü": "U",
+    "â": "A", "î": "I", "û": "U",
+})
+
+# --strict-normalize ile tam NFKD yoluna dönülür (uç HTML'ler için).
+STRICT_NORMALIZE = False
+
+
+def _norm_tr_impl(s: str) -> str:
+    if STRICT_NORMALIZE:
+        s = unicodedata.normalize("NFKD", s)
+        s = "".join(ch for ch in s if not unicodedata.combining(ch))
+        s = s.replace("İ", "I").replace("ı", "I")
+    else:
+        s = s.translate(_TR_MAP)
+    s = " ".join(s.split())
+    return s.upper()
+
+
+_norm_tr_cached = functools.lru_cache(maxsize=256)(_norm_tr_impl)
+
 
 def norm_tr(s: str) -> str:
     s = (s or "").strip()
-    s = unicodedata.normalize("NFKD", s)
-    s = "".join(ch for ch in s if not unicodedata.combining(ch))
-    s = s.replace("İ", "I").replace("ı", "I")
-    s = " ".join(s.split())
-    return s.upper()
+    # Kısa durum metinleri her tick aynı gelir -> cache'le.
+    # Büyük sayfa metinleri cache'i doldurmasın.
+    if len(s) <= 256:
+        return _norm_tr_cached(s)
+    return _norm_tr_impl(s)
 
 
 @dataclass(frozen=True)
@@ -66,44 +115,96 @@ class Snapshot:
     step: Optional[int]
     not_found: bool = False
 
-    def key(self) -> str:
-        return f"{self.status}|{self.step if self.step is not None else ''}|NF{int(self.not_found)}"
-
 
 def extract_snapshot_requests(html: str) -> Snapshot:
-    soup = BeautifulSoup(html, "html.parser")
-
-    status_el = soup.select_one("#shipmentStatus")
-    status = status_el.get_text(" ", strip=True) if status_el else ""
+    # Ucuz ön kontrol: "bulunam" ham HTML'de hiç geçmiyorsa tam metin
+    # çıkarma + normalize masrafına hiç girme (mutlu yolda her tick boşa
+    # yapılan en pahalı iş bu).
+    maybe_not_found = "bulunam" in html.lower()
+
+    # selectolax varsa onu kullan (html.parser'dan kat kat hızlı),
+    # yoksa BeautifulSoup ile devam.
+    if _FastHTMLParser is not None:
+        tree = _FastHTMLParser(html)
+
+        st_el = tree.css_first("#shipmentStatus")
+        status = st_el.text(separator=" ", strip=True) if st_el else ""
+
+        # step: #four-pack.info-graphic[data-step]
+        step_raw = None
+        four = tree.css_first("#four-pack")
+        if four is not None:
+            step_raw = four.attributes.get("data-step")
+
+        page_text = ""
+        if maybe_not_found:
+            modal = tree.css_first(_NOT_FOUND_SCOPE_SEL)
+            page_text = modal.text(separator=" ", strip=True) if modal else ""
+            if not page_text:
+                body = tree.body
+                page_text = body.text(separator=" ", strip=True) if body else ""
+    else:
+        soup = BeautifulSoup(html, "html.parser")
+
+        status_el = soup.select_one("#shipmentStatus")
+        status = status_el.get_text(" ", strip=True) if status_el else ""
+
+        step_raw = None
+        four = soup.select_one("#four-pack[data-step]")
+        if four and four.has_attr("data-step"):
+            step_raw = four["data-step"]
+
+        page_text = ""
+        if maybe_not_found:
+            modal = soup.select_one(_NOT_FOUND_SCOPE_SEL)
+            page_text = modal.get_text(" ", strip=True) if modal else ""
+            if not page_text:
+                page_text = soup.get_text(" ", strip=True)
 
-    # step: #four-pack.info-graphic[data-step]
     step = None
-    four = soup.select_one("#four-pack[data-step]")
-    if four and four.has_attr("data-step"):
+    if step_raw is not None:
         try:
-            step = int(str(four["data-step"]).strip())
+            step = int(str(step_raw).strip())
         except Exception:
             step = None
 
     # not found modal/message
-    txt = norm_tr(soup.get_text(" ", strip=True))
-    not_found = ("KARGO BULUNAMADI" in txt) or ("GONDERI KODUYLA BIR KARGO BULUNAMADI" in txt) or ("BIR KARGO BULUNAMADI" in txt)
+    not_found = False
+    if maybe_not_found:
+        not_found = _NOT_FOUND_RE.search(norm_tr(page_text)) is not None
 
     return Snapshot(status=status, step=step, not_found=not_found)
 
 
+# Aynı HTML gövdesi üst üste gelirse yeniden parse etme: hash -> Snapshot
+_SNAP_CACHE: dict = {}
+_SNAP_CACHE_MAX = 8
+
+
+def _snapshot_cached(html: str) -> Snapshot:
+    h = hashlib.blake2b(html.encode("utf-8", "ignore"), digest_size=16).digest()
+    snap = _SNAP_CACHE.get(h)
+    if snap is None:
+        snap = extract_snapshot_requests(html)
+        if len(_SNAP_CACHE) >= _SNAP_CACHE_MAX:
+            _SNAP_CACHE.pop(next(iter(_SNAP_CACHE)))
+        _SNAP_CACHE[h] = snap
+    return snap
+
+
 def classify(snap: Snapshot) -> str:
     if snap.not_found:
         return "NOT_FOUND"
 
     st = norm_tr(snap.status)
 
-    # 1) shipmentStatus doğrudan
-    if "TESLIM EDILDI" in st or "TESLİM EDİLDİ" in st:
-        return "TESLIM"
-    if "VARIS BIRIMINDE" in st or "VARIŞ BİRİMİNDE" in st:
-        return "VARDI"
-    if any(k in st for k in ["TASIMA", "TAŞIMA", "TRANSFER", "SEVK", "YOLDA"]):
+    # 1) shipmentStatus doğrudan (tek regex taraması)
+    m = _CLASSIFY_RE.search(st)
+    if m:
+        if m.lastgroup == "teslim":
+            return "TESLIM"
+        if m.lastgroup == "vardi":
+            return "VARDI"
         return "YOLDA"
 
     # 2) step fallback: 2/3/4
@@ -132,21 +233,31 @@ def looks_unreadable(snap: Snapshot, html: str) -> bool:
 
 
 class Speaker:
+    """TTS: tek uzun ömürlü worker thread + kuyruk (say() bloklamaz)."""
+
     def __init__(self):
-        self.engine = None
-        self.lock = threading.Lock()
+        self._q: queue.Queue = queue.Queue()
+        self._worker = threading.Thread(target=self._run, daemon=True)
+        self._worker.start()
+
+    def _run(self):
+        engine = None
+        while True:
+            text = self._q.get()
+            if pyttsx3 is None:
+                continue
+            try:
+                if engine is None:
+                    engine = pyttsx3.init()
+                engine.say(text)
+                engine.runAndWait()
+            except Exception:
+                engine = None
 
     def say(self, text: str):
-        if not text or pyttsx3 is None:
+        if not text:
             return
-        with self.lock:
-            if self.engine is None:
-                self.engine = pyttsx3.init()
-            try:
-                self.engine.say(text)
-                self.engine.runAndWait()
-            except Exception:
-                pass
+        self._q.put_nowait(text)
 
 
 def play_mp3(path: str):
@@ -160,36 +271,94 @@ def play_mp3(path: str):
         pass
 
 
-def fetch_requests(sess: requests.Session, code: str, timeout: int = 20) -> str:
-    # Cookie al
-    try:
-        sess.get(BASE_URL, headers={"User-Agent": UA}, timeout=timeout)
-    except Exception:
-        pass
-
-    url = TRACK_URL.format(code=code.strip())
-    r = sess.get(
-        url,
-        headers={
+def _make_session() -> requests.Session:
+    # Tek session: keep-alive + bağlantı havuzu + otomatik retry/backoff
+    sess = requests.Session()
+    adapter = HTTPAdapter(
+        pool_connections=4,
+        pool_maxsize=8,
+        # 429 bilerek listede yok: urllib3 içinde retry'lanırsa Retry-After'ı
+        # gören HTTPError ana döngüye hiç ulaşmaz; orada backoff'la ele alınır.
+        max_retries=Retry(
+            total=3,
+            backoff_factor=0.5,
+            status_forcelist=(500, 502, 503, 504),
+            allowed_methods=frozenset(["GET"]),
+        ),
+    )
+    sess.mount("https://", adapter)
+    sess.mount("http://", adapter)
+    sess.headers.update(
+        {
             "User-Agent": UA,
             "Accept-Language": "tr-TR,tr;q=0.9,en;q=0.8",
             "Cache-Control": "no-cache",
             "Pragma": "no-cache",
             "Referer": BASE_URL,
-        },
-        timeout=timeout,
-        allow_redirects=True,
+            "Connection": "keep-alive",
+        }
     )
+    return sess
+
+
+def warmup_session(sess: requests.Session, timeout: int = 20):
+    # Cookie al (bir kere yeterli; session jar'da kalır)
+    try:
+        sess.get(BASE_URL, timeout=timeout)
+    except Exception:
+        pass
+
+
+def fetch_requests(sess: requests.Session, code: str, timeout: int = 20) -> Optional[str]:
+    """Sayfayı çeker; değişmemişse (304 veya aynı gövde) None döner."""
+    url = TRACK_URL.format(code=code.strip())
+
+    # Koşullu GET: origin validator veriyorsa 304 ile gövdesiz dön.
+    headers = {}
+    etag = getattr(sess, "_last_etag", None)
+    last_mod = getattr(sess, "_last_modified", None)
+    if etag:
+        headers["If-None-Match"] = etag
+    if last_mod:
+        headers["If-Modified-Since"] = last_mod
+
+    r = sess.get(url, headers=headers or None, timeout=timeout, allow_redirects=True)
+    if r.status_code == 304:
+        return None
     r.raise_for_status()
+
+    sess._last_etag = r.headers.get("ETag")
+    sess._last_modified = r.headers.get("Last-Modified")
+
+    # Validator yoksa bile: gövde aynıysa parse etmeye değmez.
+    body_hash = hashlib.blake2b(r.content, digest_size=16).hexdigest()
+    if body_hash == getattr(sess, "_last_hash", None):
+        return None
+    sess._last_hash = body_hash
+
     return r.text
 
 
-def _make_driver():
+def _make_driver(debugger_address: str = ""):
     # Selenium Manager (varsayılan) -> olmazsa webdriver-manager fallback
     from selenium import webdriver
     from selenium.webdriver.chrome.options import Options
 
+    # Kalıcı Chrome'a bağlan (örn. önceden açılmış:
+    #   chrome --headless=new --remote-debugging-port=9222 --user-data-dir=/tmp/yk
+    # ): her driver reset'inde yeni binary + chromedriver başlatma maliyeti yok.
+    if debugger_address:
+        opts = Options()
+        opts.page_load_strategy = "eager"
+        opts.add_experimental_option("debuggerAddress", debugger_address)
+        try:
+            return webdriver.Chrome(options=opts)
+        except Exception:
+            pass  # bağlanamadıysa kendi Chrome'umuzu başlat
+
     opts = Options()
+    # DOMContentLoaded yeterli; full load bekleme
+    opts.page_load_strategy = "eager"
     # headless (Chrome 109+)
     opts.add_argument("--headless=new")
     opts.add_argument("--disable-gpu")
@@ -198,6 +367,17 @@ def _make_driver():
     opts.add_argument(f"--user-agent={UA}")
     opts.add_argument("--window-size=1200,900")
 
+    # Sadece metin kazıyoruz: resim/font/CSS yüklemeye gerek yok
+    opts.add_argument("--blink-settings=imagesEnabled=false")
+    opts.add_experimental_option(
+        "prefs",
+        {
+            "profile.managed_default_content_settings.images": 2,
+            "profile.managed_default_content_settings.fonts": 2,
+            "profile.managed_default_content_settings.stylesheets": 2,
+        },
+    )
+
     try:
         return webdriver.Chrome(options=opts)
     except Exception:
@@ -210,6 +390,27 @@ def _make_driver():
             raise RuntimeError(f"Chrome WebDriver başlatılamadı: {e}")
 
 
+# DOM hazır mı? (step 2/3/4 VEYA status dolu) — tek round-trip
+_SEL_READY_JS = (
+    "const fp = document.getElementById('four-pack');"
+    "const ss = document.getElementById('shipmentStatus');"
+    "const s = String(fp ? (fp.getAttribute('data-step') || '') : '').trim();"
+    "const t = (ss ? (ss.innerText || '') : '').trim();"
+    "return ['2','3','4'].includes(s) || (t.length > 0 && !/^\\*+$/.test(t));"
+)
+
+# status + step + not-found tek seferde — 3 round-trip yerine 1
+_SEL_SNAPSHOT_JS = (
+    "const fp = document.getElementById('four-pack');"
+    "const ss = document.getElementById('shipmentStatus');"
+    "return {"
+    "  step: fp ? (fp.getAttribute('data-step') || '') : '',"
+    "  status: ss ? (ss.innerText || '') : '',"
+    "  nf: ((document.body && document.body.innerText) || '').toUpperCase().includes('BULUNAMADI')"
+    "};"
+)
+
+
 def fetch_selenium(code: str, driver, wait_s: int = 25) -> tuple[Snapshot, str]:
     """
     JS dolana kadar bekler:
@@ -220,60 +421,90 @@ def fetch_selenium(code: str, driver, wait_s: int = 25) -> tuple[Snapshot, str]:
     from selenium.webdriver.support.ui import WebDriverWait
 
     url = TRACK_URL.format(code=code.strip())
+
+    # İlk seferde normal navigasyon (origin + cookie); sonraki tur'larda
+    # sayfayı baştan yüklemek yerine sayfa içi fetch() ile aynı URL'i çek.
+    if getattr(driver, "_origin_loaded", False):
+        try:
+            driver.set_script_timeout(wait_s)
+            html = driver.execute_async_script(
+                "const cb = arguments[arguments.length - 1];"
+                "fetch(arguments[0], {credentials: 'include', cache: 'no-store'})"
+                ".then(r => r.text()).then(cb).catch(() => cb(''));",
+                url,
+            ) or ""
+            if html:
+                snap = _snapshot_cached(html)
+                # Sunucu JS'siz kabuk HTML dönerse (status/step boş) bu yol
+                # işe yaramaz; normal navigasyon + bekleme yoluna düş.
+                if not looks_unreadable(snap, html):
+                    return snap, html
+        except Exception:
+            pass
+        # fetch okunabilir snapshot vermediyse normal navigasyona düş
+
     driver.get(url)
+    driver._origin_loaded = True
 
     # 1) sayfa hazır
     WebDriverWait(driver, wait_s).until(lambda d: d.execute_script("return document.readyState") == "complete")
 
-    # 2) data-step 2/3/4 bekle (yolda/vardı/teslim)
-    def step_ok(d):
-        try:
-            step = d.execute_script("return document.getElementById('four-pack')?.getAttribute('data-step') || ''")
-            return str(step).strip() in ("2", "3", "4")
-        except Exception:
-            return False
-
-    # 3) status metni bekle (yıldız/boş değil)
-    def status_ok(d):
+    # 2) step 2/3/4 VEYA dolu status bekle — tek script, tek round-trip
+    def dom_ok(d):
         try:
-            s = d.execute_script("return document.getElementById('shipmentStatus')?.innerText || ''")
-            s = (s or "").strip()
-            if not s:
-                return False
-            if set(s) <= {"*"}:
-                return False
-            return True
+            return bool(d.execute_script(_SEL_READY_JS))
         except Exception:
             return False
 
-    # İkisini de beklemeyi dene; birisi gelmezse diğeriyle de ilerleyebiliriz.
     try:
-        WebDriverWait(driver, wait_s).until(lambda d: step_ok(d) or status_ok(d))
+        WebDriverWait(driver, wait_s).until(dom_ok)
     except Exception:
         pass
 
-    # Çek
-    status = driver.execute_script("return document.getElementById('shipmentStatus')?.innerText || ''") or ""
-    step_raw = driver.execute_script("return document.getElementById('four-pack')?.getAttribute('data-step') || ''")
+    # Çek: status + step + not-found tek seferde
+    data = driver.execute_script(_SEL_SNAPSHOT_JS) or {}
+    status = str(data.get("status") or "")
+    step_raw = str(data.get("step") or "").strip()
     try:
-        step = int(str(step_raw).strip()) if str(step_raw).strip().isdigit() else None
+        step = int(step_raw) if step_raw.isdigit() else None
     except Exception:
         step = None
 
-    html = driver.execute_script("return document.documentElement.outerHTML") or ""
+    snap = Snapshot(status=status.strip(), step=step, not_found=bool(data.get("nf")))
+
+    # outerHTML sadece debug için lazım olduğunda çekilir
+    html = ""
+    if looks_unreadable(snap, html):
+        html = driver.execute_script("return document.documentElement.outerHTML") or ""
 
-    # not found (modal) kontrolü
-    txt = norm_tr(re.sub(r"<[^>]+>", " ", html))
-    not_found = ("KARGO BULUNAMADI" in txt) or ("GONDERI KODUYLA BIR KARGO BULUNAMADI" in txt) or ("BIR KARGO BULUNAMADI" in txt)
+    return snap, html
 
-    return Snapshot(status=status.strip(), step=step, not_found=not_found), html
+
+# Debug HTML yazımı fire-and-forget: poll thread'ini bloklamasın.
+_DEBUG_Q: queue.Queue = queue.Queue()
+_DEBUG_WRITER = [None]
+
+
+def _debug_writer():
+    while True:
+        path, data = _DEBUG_Q.get()
+        try:
+            fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644)
+            try:
+                os.write(fd, data)
+            finally:
+                os.close(fd)
+        except Exception:
+            pass
 
 
 def save_debug(html: str, tag: str, code: str) -> str:
-    ts = datetime.now().strftime("%Y%m%d_%H%M%S")
-    name = f"debug_{code}_{tag}_{ts}.html"
-    with open(name, "w", encoding="utf-8") as f:
-        f.write(html)
+    name = f"debug_{code}_{tag}_{int(time.time())}.html"
+    if _DEBUG_WRITER[0] is None:
+        t = threading.Thread(target=_debug_writer, daemon=True)
+        t.start()
+        _DEBUG_WRITER[0] = t
+    _DEBUG_Q.put_nowait((name, html.encode("utf-8", "replace")))
     return os.path.abspath(name)
 
 
@@ -286,93 +517,227 @@ def should_stop(current: str, target: str) -> bool:
     return current in ("VARDI", "TESLIM")
 
 
+# Aynı saniye içindeki log'lar formatlanmış saati yeniden kullanır.
+_LOG_SEC = [0]
+_LOG_STR = [""]
+
+
 def log(line: str):
-    now = datetime.now().strftime("%H:%M:%S")
-    print(f"[{now}] {line}")
+    now_s = int(time.time())
+    if now_s != _LOG_SEC[0]:
+        _LOG_STR[0] = time.strftime("%H:%M:%S", time.localtime(now_s))
+        _LOG_SEC[0] = now_s
+    print(f"[{_LOG_STR[0]}] {line}")
 
 
 def parse_args(argv: list[str]) -> argparse.Namespace:
     p = argparse.ArgumentParser()
     p.add_argument("code", nargs="?", help="Gönderi kodu")
     p.add_argument("interval", nargs="?", type=int, default=None, help="Saniye (örn 15)")
-    p.add_argument("--mp3", default=DEFAULT_MP3, help="Durum değişince çalınacak mp3 yolu (boş bırakabilirsin)")
-    p.add_argument("--tts", action="store_true", help="TTS konuş (yolda/vardı/teslim)")
-    p.add_argument("--target", choices=["YOLDA", "VARDI", "TESLIM"], default="VARDI", help="Hedef durum")
-    p.add_argument("--stop", action="store_true", help="Hedefe gelince durdur")
-    p.add_argument("--mode", choices=["auto", "requests", "selenium"], default="auto", help="Çekme modu")
-    p.add_argument("--debug", action="store_true", help="Okunamayan durumda HTML debug kaydet")
+    # Default'lar None: "CLI'da verildi mi?" ayrımı config birleştirmesi
+    # için lazım; eksik kalanlar _fill_default_opts ile tamamlanır.
+    p.add_argument("--mp3", default=None, help=f"Durum değişince çalınacak mp3 yolu (default {DEFAULT_MP3})")
+    p.add_argument("--tts", action="store_true", default=None, help="TTS konuş (yolda/vardı/teslim)")
+    p.add_argument("--target", choices=["YOLDA", "VARDI", "TESLIM"], default=None, help="Hedef durum (default VARDI)")
+    p.add_argument("--stop", action="store_true", default=None, help="Hedefe gelince durdur")
+    p.add_argument("--mode", choices=["auto", "requests", "selenium"], default=None, help="Çekme modu (default auto)")
+    p.add_argument("--debug", action="store_true", default=None, help="Okunamayan durumda HTML debug kaydet")
+    p.add_argument("--strict-normalize", action="store_true", help="Metin normalize için tam NFKD yolu (uç HTML'ler için)")
+    p.add_argument(
+        "--chrome-debugger",
+        default=os.environ.get("YURTICI_DEBUGGER", ""),
+        help="Açık Chrome'a bağlan (örn 127.0.0.1:9222); boşsa kendi Chrome'u başlatılır",
+    )
     return p.parse_args(argv)
 
 
-def prompt_if_missing(ns: argparse.Namespace) -> argparse.Namespace:
-    if ns.code:
+def _load_config() -> dict:
+    """YURTICI_CONFIG env (JSON) veya ~/.yurticirc (key=value) oku."""
+    raw = os.environ.get("YURTICI_CONFIG")
+    if raw:
+        try:
+            cfg = json.loads(raw)
+            return cfg if isinstance(cfg, dict) else {}
+        except Exception:
+            return {}
+
+    path = os.path.expanduser("~/.yurticirc")
+    if not os.path.exists(path):
+        return {}
+    cfg = {}
+    try:
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                line = line.strip()
+                if not line or line.startswith("#") or "=" not in line:
+                    continue
+                k, v = line.split("=", 1)
+                cfg[k.strip()] = v.strip()
+    except Exception:
+        return {}
+    return cfg
+
+
+def _as_bool(v) -> bool:
+    return str(v).strip().lower() in ("1", "true", "e", "evet", "yes")
+
+
+def apply_config(ns: argparse.Namespace) -> argparse.Namespace:
+    """CLI'da verilmeyen alanları config'ten doldur (etkileşimsiz kullanım)."""
+    cfg = _load_config()
+    if not cfg:
         return ns
 
-    print("Gönderi kodu gir (örn 60991100...): ", end="", flush=True)
-    ns.code = input().strip()
-    if not ns.code:
-        print("Kod boş. Çıkılıyor.")
-        sys.exit(1)
+    if not ns.code and cfg.get("code"):
+        ns.code = str(cfg["code"]).strip()
+    if ns.interval is None and cfg.get("interval"):
+        try:
+            ns.interval = int(cfg["interval"])
+        except Exception:
+            pass
+    # Aşağıdakiler sadece CLI'da verilmediyse (None) config'ten gelir.
+    if ns.target is None:
+        tg = str(cfg.get("target", "")).strip().upper()
+        if tg in ("VARDI", "TESLIM", "YOLDA"):
+            ns.target = tg
+    if ns.stop is None and "stop" in cfg:
+        ns.stop = _as_bool(cfg["stop"])
+    if ns.tts is None and "tts" in cfg:
+        ns.tts = _as_bool(cfg["tts"])
+    if ns.mp3 is None and "mp3" in cfg:
+        ns.mp3 = str(cfg["mp3"])
+    if ns.mode is None:
+        md = str(cfg.get("mode", "")).strip().lower()
+        if md in ("auto", "requests", "selenium"):
+            ns.mode = md
+    if ns.debug is None and "debug" in cfg:
+        ns.debug = _as_bool(cfg["debug"])
+    return ns
 
-    print("Aralık (sn) [15]: ", end="", flush=True)
-    iv = input().strip()
-    ns.interval = int(iv) if iv else 15
 
-    print("Hedef [VARDI/TESLIM/YOLDA] (default VARDI): ", end="", flush=True)
-    tg = input().strip().upper()
-    if tg in ("VARDI", "TESLIM", "YOLDA"):
-        ns.target = tg
+def _fill_default_opts(ns: argparse.Namespace) -> argparse.Namespace:
+    """CLI/config/prompt sonrası hâlâ boş kalan alanlara varsayılanlar."""
+    if ns.target is None:
+        ns.target = "VARDI"
+    if ns.stop is None:
+        ns.stop = False
+    if ns.tts is None:
+        ns.tts = False
+    if ns.mp3 is None:
+        ns.mp3 = DEFAULT_MP3
+    if ns.mode is None:
+        ns.mode = "auto"
+    if ns.debug is None:
+        ns.debug = False
+    return ns
 
-    print("Hedefe gelince durdur? [E/h] (default E): ", end="", flush=True)
-    st = input().strip().lower()
-    ns.stop = False if st == "h" else True
 
-    print("MP3 yolu (enter = boş): ", end="", flush=True)
-    mp = input().strip()
-    ns.mp3 = mp  # boş olabilir
+def prompt_if_missing(ns: argparse.Namespace) -> argparse.Namespace:
+    ns = apply_config(ns)
+    if ns.code:
+        return _fill_default_opts(ns)
+
+    # Tek okuma: 6 ayrı print+input turu yerine bir satırda hepsi.
+    print(
+        "Tek satırda gir: KOD [ARALIK sn] [HEDEF VARDI/TESLIM/YOLDA] [STOP E/h] [MP3 yolu] [TTS E/h]\n"
+        'örn: 60991100... 15 VARDI E "C:\\ok.mp3" E  (sadece kod da yeter)\n'
+        "> ",
+        end="",
+        flush=True,
+    )
+    try:
+        parts = shlex.split(input().strip())
+    except ValueError:
+        parts = []
+    if not parts:
+        print("Kod boş. Çıkılıyor.")
+        sys.exit(1)
 
-    print("TTS açılsın mı? [E/h] (default E): ", end="", flush=True)
-    t = input().strip().lower()
-    ns.tts = False if t == "h" else True
+    ns.code = parts[0]
+    ns.interval = int(parts[1]) if len(parts) > 1 and parts[1].isdigit() else 15
+    tg = parts[2].strip().upper() if len(parts) > 2 else ""
+    if tg in ("VARDI", "TESLIM", "YOLDA"):
+        ns.target = tg
+    ns.stop = False if (len(parts) > 3 and parts[3].strip().lower() == "h") else True
+    ns.mp3 = parts[4] if len(parts) > 4 else ""
+    ns.tts = False if (len(parts) > 5 and parts[5].strip().lower() == "h") else True
 
     ns.mode = "auto"
     ns.debug = True
-    return ns
+    return _fill_default_opts(ns)
 
 
 def main(argv: list[str]) -> int:
     ns = parse_args(argv)
     ns = prompt_if_missing(ns)
 
+    if ns.strict_normalize:
+        global STRICT_NORMALIZE
+        STRICT_NORMALIZE = True
+
     interval = ns.interval if ns.interval is not None else 15
     interval = max(5, interval)
 
     speaker = Speaker() if ns.tts else None
 
-    sess = requests.Session()
+    sess = _make_session()
+    warmup_session(sess)
     driver = None
 
     log(f"Takip başladı: {ns.code} | aralık: {interval}s | hedef: {ns.target} | stop: {'E' if ns.stop else 'H'} | mode: {ns.mode}")
 
-    last_key = None
+    last_snap: Optional[Snapshot] = None
+    # Son snapshot requests yolundan mı okundu? Selenium'dan geldiyse
+    # "gövde değişmemiş" kısayolu geçersiz (requests gövdesi zaten kabuk).
+    last_from_requests = False
     said_initial = False
 
+    # Adaptif aralık: durum değişmedikçe kademeli uzat, değişince sıfırla.
+    cur_interval = float(interval)
+
+    # Üst üste hata: jitter'lı üstel backoff (origin'i dövmeyelim).
+    fail_streak = 0
+
+    # Event tabanlı bekleme: Ctrl+C anında uyanır, ileride dış tetikleyici
+    # (webhook/stdin) de aynı event'i set edebilir.
+    wakeup = threading.Event()
+    stop_req = threading.Event()
+
+    def _on_sigint(*_):
+        stop_req.set()
+        wakeup.set()
+
+    try:
+        signal.signal(signal.SIGINT, _on_sigint)
+    except Exception:
+        pass
+
     while True:
+        if stop_req.is_set():
+            log("Durduruldu (Ctrl+C).")
+            break
         try:
             snap = None
             html = ""
+            unchanged = False
 
             # ---- requests ----
             if ns.mode in ("auto", "requests"):
-                html = fetch_requests(sess, ns.code)
-                snap = extract_snapshot_requests(html)
+                body = fetch_requests(sess, ns.code)
+                if body is None and last_snap is not None and last_from_requests:
+                    # 304 ya da gövde değişmemiş: önceki snapshot geçerli
+                    snap = last_snap
+                    unchanged = True
+                elif body is not None:
+                    html = body
+                    snap = _snapshot_cached(html)
 
             # unreadable -> selenium
-            if ns.mode == "selenium" or (ns.mode == "auto" and (snap is None or looks_unreadable(snap, html))):
+            if ns.mode == "selenium" or (ns.mode == "auto" and not unchanged and (snap is None or looks_unreadable(snap, html))):
                 if ns.mode == "auto":
                     log("(auto) Selenium moduna geçildi (JS ile dolan sayfa tespit edildi).")
                 if driver is None:
-                    driver = _make_driver()
+                    driver = _make_driver(ns.chrome_debugger)
 
                 try:
                     snap, html = fetch_selenium(ns.code, driver)
@@ -383,7 +748,7 @@ def main(argv: list[str]) -> int:
                             driver.quit()
                         except Exception:
                             pass
-                        driver = _make_driver()
+                        driver = _make_driver(ns.chrome_debugger)
                         snap, html = fetch_selenium(ns.code, driver)
                     else:
                         raise
@@ -392,11 +757,21 @@ def main(argv: list[str]) -> int:
                     p = save_debug(html, "selenium", ns.code)
                     log(f"UYARI: Selenium ile de status/step okunamadı. Debug: {p}")
 
+                last_from_requests = False
+            elif snap is not None and not unchanged:
+                # requests yolu okunabilir bir snapshot üretti
+                last_from_requests = True
+
             if snap is None:
                 log("HATA: Snapshot üretilemedi.")
-                time.sleep(interval)
+                if wakeup.wait(interval):
+                    wakeup.clear()
                 continue
 
+            if fail_streak:
+                fail_streak = 0
+                cur_interval = float(interval)
+
             state = classify(snap)
 
             # NOT_FOUND -> durdur
@@ -405,24 +780,26 @@ def main(argv: list[str]) -> int:
                 break
 
             # log
-            if last_key is None:
-                last_key = snap.key()
+            if last_snap is None:
+                last_snap = snap
+                cur_interval = float(interval)
                 log(f"İlk durum: {state} ({snap.status or '-'}) step={snap.step if snap.step is not None else '-'}")
                 if speaker and not said_initial:
                     word = "teslim" if state == "TESLIM" else ("vardı" if state == "VARDI" else "yolda")
-                    threading.Thread(target=speaker.say, args=(word,), daemon=True).start()
+                    speaker.say(word)
                     said_initial = True
 
                 if ns.stop and should_stop(state, ns.target):
                     if ns.mp3:
                         threading.Thread(target=play_mp3, args=(ns.mp3,), daemon=True).start()
                     if speaker and state in ("VARDI", "TESLIM"):
-                        threading.Thread(target=speaker.say, args=("teslim" if state=="TESLIM" else "vardı",), daemon=True).start()
+                        speaker.say("teslim" if state == "TESLIM" else "vardı")
                     log(f"Hedef zaten sağlandı ({ns.target}). Durduruldu.")
                     break
             else:
-                if snap.key() != last_key:
-                    last_key = snap.key()
+                if snap != last_snap:
+                    last_snap = snap
+                    cur_interval = float(interval)
                     log(f"Durum değişti: {state} ({snap.status or '-'}) step={snap.step if snap.step is not None else '-'}")
 
                     if ns.mp3:
@@ -430,23 +807,42 @@ def main(argv: list[str]) -> int:
 
                     if speaker:
                         if state == "VARDI":
-                            threading.Thread(target=speaker.say, args=("vardı",), daemon=True).start()
+                            speaker.say("vardı")
                         elif state == "TESLIM":
-                            threading.Thread(target=speaker.say, args=("teslim",), daemon=True).start()
+                            speaker.say("teslim")
 
                     if ns.stop and should_stop(state, ns.target):
                         log(f"Hedefe ulaştı ({ns.target}). Durduruldu.")
                         break
                 else:
+                    # Değişiklik yok: aralığı uzat. Hedef uzaktaysa (YOLDA ->
+                    # TESLIM) tavanı daha yüksek tut.
+                    cap = 300.0 if (state == "YOLDA" and ns.target == "TESLIM") else interval * 8.0
+                    cur_interval = min(cap, cur_interval * 1.5)
                     log(f"Durum aynı: {state} ({snap.status or '-'}) step={snap.step if snap.step is not None else '-'}")
 
         except KeyboardInterrupt:
             log("Durduruldu (Ctrl+C).")
             break
         except Exception as e:
-            log(f"HATA: {e}")
+            fail_streak += 1
+
+            # 429 ise Retry-After'a aynen uy
+            retry_after = None
+            if isinstance(e, requests.HTTPError) and e.response is not None and e.response.status_code == 429:
+                ra = str(e.response.headers.get("Retry-After", "")).strip()
+                if ra.isdigit():
+                    retry_after = float(ra)
+
+            if retry_after is not None:
+                cur_interval = retry_after
+            else:
+                cur_interval = min(interval * (2 ** fail_streak), 300) + random.uniform(0, interval)
+
+            log(f"HATA: {e} (deneme {fail_streak}, {cur_interval:.0f}s sonra)")
 
-        time.sleep(interval)
+        if wakeup.wait(cur_interval):
+            wakeup.clear()
 
     try:
         if driver is not None: